@@ -1,18 +1,91 @@
 """
 Copia foto da iPhone (MTP) → Windows 11
 Richiede: pip install pywin32
+Opzionale: pip install comtypes (trasferimento diretto via WPD)
 """
 
 import os
+import sys
+import re
+import ctypes
 import json
-import datetime
+import struct
 import time
-from typing import List, Optional, Tuple
+import threading
+import queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
+from functools import lru_cache
+from operator import itemgetter
 import pythoncom
+import pywintypes
 import win32com.client as win32
 import win32clipboard
 
+try:
+    import comtypes
+    import comtypes.client
+    comtypes.client.GetModule("portabledeviceapi.dll")
+    comtypes.client.GetModule("portabledevicetypes.dll")
+    from comtypes.gen import PortableDeviceApiLib as wpd_api
+    from comtypes.gen import PortableDeviceTypesLib as wpd_types
+except Exception:
+    # Senza comtypes si usa solo la copia tramite shell di Windows
+    wpd_api = wpd_types = None
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'config.json')
+DEVICE_CACHE_PATH = os.path.join(os.path.dirname(__file__), 'device_cache.json')
+DEVICE_NAME_KEYWORDS = ("iphone", "apple")
+DEFAULT_MAX_WORKERS = 4
+
+# Attesa della copia tramite shell: backoff esponenziale (secondi)
+WAIT_DELAYS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1)
+COPYHERE_TIMEOUT = 0.2  # Oltre si passa al metodo clipboard
+CLIPBOARD_TIMEOUT = 10.0
+
+# Costanti Windows Portable Devices
+WPD_DEVICE_OBJECT_ID = "DEVICE"
+WPD_CHUNK_SIZE = 1024 * 1024  # 1 MB per lettura
+WPD_ENUM_BATCH = 256  # Object ID richiesti per ogni chiamata a Next
+WPD_PENDING_WRITES = 3  # Blocchi in scrittura su disco mentre si legge il successivo
+STGM_READ = 0
+VT_DATE = 7
+OLE_DATE_UNIX_EPOCH = 25569  # Giorni tra 30/12/1899 (data OLE zero) e 01/01/1970
+
+
+def _wpd_key(fmtid: str, pid: int) -> object:
+    """Crea una PROPERTYKEY WPD"""
+    key = wpd_api._tagpropertykey()
+    key.fmtid = comtypes.GUID(fmtid)
+    key.pid = pid
+    return key
+
+
+if wpd_api is not None:
+    WPD_OBJECT_NAME = _wpd_key("{EF6B490D-5CD8-437A-AFFC-DA8B60EE4A3C}", 4)
+    WPD_OBJECT_SIZE = _wpd_key("{EF6B490D-5CD8-437A-AFFC-DA8B60EE4A3C}", 11)
+    WPD_OBJECT_ORIGINAL_FILE_NAME = _wpd_key("{EF6B490D-5CD8-437A-AFFC-DA8B60EE4A3C}", 12)
+    WPD_OBJECT_DATE_MODIFIED = _wpd_key("{EF6B490D-5CD8-437A-AFFC-DA8B60EE4A3C}", 19)
+    WPD_RESOURCE_DEFAULT = _wpd_key("{E81E79BE-34F0-41BF-B53F-F1A06AE87842}", 0)
+
+
+def _file_exists(path: str) -> bool:
+    """Verifica l'esistenza di un file con una sola stat, senza passare da os.path"""
+    try:
+        os.stat(path, follow_symlinks=False)
+        return True
+    except OSError:
+        return False
+
+
+@lru_cache(maxsize=1)
+def _load_config(path: str) -> dict:
+    """Legge il file di configurazione una sola volta"""
+    with open(path, 'rb') as f:
+        return json.loads(f.read())
+
 
 @dataclass
 class CopyResult:
@@ -25,26 +98,172 @@ class CopyResult:
     velocita_media: float = 0.0
 
 
+class WPDDevice:
+    """Accesso diretto al dispositivo tramite le API Windows Portable Devices"""
+    
+    def __init__(self, device_id: str):
+        self.device_id = device_id
+        client_info = comtypes.client.CreateObject(
+            wpd_types.PortableDeviceValues,
+            clsctx=comtypes.CLSCTX_INPROC_SERVER,
+            interface=wpd_api.IPortableDeviceValues
+        )
+        self.device = comtypes.client.CreateObject(
+            wpd_api.PortableDevice,
+            clsctx=comtypes.CLSCTX_INPROC_SERVER,
+            interface=wpd_api.IPortableDevice
+        )
+        self.device.Open(device_id, client_info)
+        self.content = self.device.Content()
+        self.properties = self.content.Properties()
+        self.resources = self.content.Transfer()
+        
+        # Proprietà lette con una sola GetValues per oggetto
+        self.keys = comtypes.client.CreateObject(
+            wpd_types.PortableDeviceKeyCollection,
+            clsctx=comtypes.CLSCTX_INPROC_SERVER,
+            interface=wpd_api.IPortableDeviceKeyCollection
+        )
+        for key in (WPD_OBJECT_NAME, WPD_OBJECT_ORIGINAL_FILE_NAME, WPD_OBJECT_SIZE,
+                    WPD_OBJECT_DATE_MODIFIED):
+            self.keys.Add(key)
+        
+        # Thread di scrittura: il disco lavora mentre si legge il blocco successivo
+        self.writer = ThreadPoolExecutor(max_workers=1)
+    
+    def close(self) -> None:
+        """Chiude la connessione al dispositivo"""
+        self.writer.shutdown()
+        self.device.Close()
+    
+    def _child_ids(self, parent_id: str) -> List[str]:
+        """Elenca gli object ID figli di un oggetto"""
+        enum = self.content.EnumObjects(0, parent_id, None)
+        ids = []
+        while True:
+            batch = (ctypes.c_wchar_p * WPD_ENUM_BATCH)()
+            fetched = ctypes.pointer(ctypes.c_ulong(0))
+            enum.Next(WPD_ENUM_BATCH, ctypes.cast(batch, ctypes.POINTER(ctypes.c_wchar_p)), fetched)
+            if fetched.contents.value == 0:
+                break
+            ids.extend(batch[:fetched.contents.value])
+        return ids
+    
+    @staticmethod
+    def _get_date_value(values: object, key: object) -> Optional[float]:
+        """Legge una data WPD (VT_DATE) come timestamp Unix, None se assente"""
+        try:
+            value = values.GetValue(key)
+        except comtypes.COMError:
+            return None
+        try:
+            # PROPVARIANT: vt (2 byte), 6 byte riservati, poi il valore
+            vt, ole_date = struct.unpack_from("<H6xd", ctypes.string_at(ctypes.addressof(value), 16))
+        finally:
+            ctypes.oledll.ole32.PropVariantClear(ctypes.byref(value))
+        if vt != VT_DATE:
+            return None
+        
+        # Data OLE: giorni dal 30/12/1899, espressa nell'ora locale del dispositivo
+        try:
+            local_seconds = (ole_date - OLE_DATE_UNIX_EPOCH) * 86400
+            return time.mktime(time.gmtime(local_seconds)[:8] + (-1,))
+        except (OSError, OverflowError, ValueError):
+            return None
+    
+    def children(self, parent_id: str) -> Dict[str, Tuple[str, int, Optional[float]]]:
+        """Restituisce nome → (object ID, dimensione, data di modifica) per i figli di un oggetto"""
+        result = {}
+        for object_id in self._child_ids(parent_id):
+            values = self.properties.GetValues(object_id, self.keys)
+            name = None
+            for key in (WPD_OBJECT_ORIGINAL_FILE_NAME, WPD_OBJECT_NAME):
+                try:
+                    name = values.GetStringValue(key)
+                    break
+                except comtypes.COMError:
+                    continue
+            try:
+                size = values.GetUnsignedLargeIntegerValue(WPD_OBJECT_SIZE)
+            except comtypes.COMError:
+                size = -1  # Cartelle e storage non hanno dimensione
+            if name:
+                result[name] = (object_id, size, self._get_date_value(values, WPD_OBJECT_DATE_MODIFIED))
+        return result
+    
+    def transfer(self, object_id: str, dest_path: str, size: int = -1, mtime: Optional[float] = None) -> bool:
+        """Copia il contenuto di un oggetto su file, a blocchi da 1 MB"""
+        optimal_size = ctypes.pointer(ctypes.c_ulong(0))
+        stream = ctypes.POINTER(wpd_api.IStream)()
+        self.resources.GetStream(object_id, WPD_RESOURCE_DEFAULT, STGM_READ,
+                                 optimal_size, ctypes.pointer(stream))
+        
+        # Scrive su file temporaneo: un file interrotto non deve risultare già copiato
+        tmp_path = dest_path + ".part"
+        buf = (ctypes.c_ubyte * WPD_CHUNK_SIZE)()
+        written = 0
+        writes = deque()
+        try:
+            with open(tmp_path, 'wb') as f:
+                try:
+                    while True:
+                        buf, read = stream.RemoteRead(buf, ctypes.c_ulong(WPD_CHUNK_SIZE))
+                        if read == 0:
+                            break  # Trasferimento completato
+                        writes.append(self.writer.submit(f.write, bytes(memoryview(buf)[:read])))
+                        written += read
+                        if len(writes) > WPD_PENDING_WRITES:
+                            writes.popleft().result()
+                finally:
+                    # Il file si chiude solo dopo l'ultima scrittura
+                    for w in writes:
+                        w.result()
+            
+            if size >= 0 and written != size:
+                os.remove(tmp_path)
+                return False
+            os.replace(tmp_path, dest_path)
+        except BaseException:
+            # Nessun file parziale deve restare nella cartella delle foto
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        
+        if mtime is not None:
+            # Mantiene la data della foto sul dispositivo, come la copia tramite shell
+            os.utime(dest_path, (mtime, mtime))
+        return True
+
+
 class IPhoneMTPCopier:
     """Gestisce la copia di foto da iPhone tramite MTP"""
     
-    def __init__(self, dest_dir: Optional[str] = None):
+    def __init__(self, dest_dir: Optional[str] = None, max_workers: Optional[int] = None,
+                 verbose: Optional[bool] = None):
         self.desktop = os.path.join(os.environ['USERPROFILE'], 'Desktop')
         self.dest_dir = dest_dir or self._get_destination_folder()
         self.log_file = os.path.join(self.dest_dir, "log.txt")
+        self._log_fh = None
+        self._log_lock = threading.Lock()
+        # Log per singolo file copiato/saltato (gli errori sono sempre registrati)
+        self.verbose = verbose if verbose is not None else bool(self._get_config_option('verbose', False))
         self.shell = None
-        # Statistiche per stima tempo
+        # Accesso diretto WPD (None = solo shell)
+        self.wpd = None
+        self.wpd_rolls = {}
+        # Numero di copie MTP in parallelo (1 = sequenziale)
+        self.max_workers = max(1, max_workers or self._get_max_workers())
+        # Statistiche per stima tempo (condivise tra i thread di copia)
         self.start_time = None
         self.files_copied_total = 0
-        self.copy_times = []  # Lista tempi di copia per calcolare media
+        self.copy_time_sum = 0.0  # Somma dei tempi di copia per calcolare la media
+        self._stats_lock = threading.Lock()
+        self._clipboard_lock = threading.Lock()
     
     def _get_destination_folder(self) -> str:
         """Legge la cartella di destinazione dal file di configurazione"""
-        config_path = os.path.join(os.path.dirname(__file__), 'config.json')
-        
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = _load_config(CONFIG_PATH)
                 
             if config.get('use_desktop', True):
                 return os.path.join(self.desktop, 'iphone_photo_copier')
@@ -61,19 +280,37 @@ class IPhoneMTPCopier:
             # Se config.json non esiste, crealo con valori predefiniti
             default_config = {
                 "use_desktop": True,
-                "custom_path": "C:/Users/nome_utente/Pictures/iPhone"
+                "custom_path": "C:/Users/nome_utente/Pictures/iPhone",
+                "max_workers": DEFAULT_MAX_WORKERS,
+                "verbose": False
             }
-            with open(config_path, 'w', encoding='utf-8') as f:
+            with open(CONFIG_PATH, 'w', encoding='utf-8') as f:
                 json.dump(default_config, f, indent=2)
             return os.path.join(self.desktop, 'photo_iphone')
             
         except Exception as e:
             print(f"⚠️ Error reading config: {e}")
             return os.path.join(self.desktop, 'photo_iphone')
+
+    @staticmethod
+    def _get_config_option(key: str, default: object) -> object:
+        """Legge un'opzione dal file di configurazione"""
+        try:
+            return _load_config(CONFIG_PATH).get(key, default)
+        except Exception:
+            return default
+
+    def _get_max_workers(self) -> int:
+        """Legge il numero di copie parallele dal file di configurazione"""
+        try:
+            return int(self._get_config_option('max_workers', DEFAULT_MAX_WORKERS))
+        except (TypeError, ValueError):
+            return DEFAULT_MAX_WORKERS
         
     def __enter__(self):
         """Inizializza COM e crea directory di destinazione"""
         os.makedirs(self.dest_dir, exist_ok=True)
+        self._log_fh = open(self.log_file, "a", encoding="utf-8", buffering=1)
         pythoncom.CoInitialize()
         self.shell = win32.Dispatch("Shell.Application")
         return self
@@ -81,33 +318,96 @@ class IPhoneMTPCopier:
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Pulisce risorse e deinizializza COM"""
         self._clear_clipboard()
+        if self.wpd:
+            self.wpd.close()
+            self.wpd = None
         pythoncom.CoUninitialize()
+        if self._log_fh:
+            self._log_fh.close()
+            self._log_fh = None
+
+    @staticmethod
+    def _timestamp() -> str:
+        """Ora corrente nel formato del log"""
+        return time.strftime("%Y-%m-%d %H:%M:%S")
 
     def log(self, msg: str) -> None:
         """Registra messaggi su console e file"""
-        ts = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        line = f"[{ts}] {msg}"
-        print(line)
-        with open(self.log_file, "a", encoding="utf-8") as f:
-            f.write(line + "\n")
+        self.log_batch([(self._timestamp(), msg)])
+
+    def log_batch(self, entries: List[Tuple[str, str]]) -> None:
+        """Registra più messaggi (ora, testo) con una sola scrittura su console e file"""
+        if not entries:
+            return
+        text = "".join(f"[{ts}] {msg}\n" for ts, msg in entries)
+        with self._log_lock:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+            if self._log_fh:
+                self._log_fh.write(text)
+            else:
+                with open(self.log_file, "a", encoding="utf-8") as f:
+                    f.write(text)
 
+    @staticmethod
+    def _is_iphone_name(name: str) -> bool:
+        """Verifica se il nome di un dispositivo corrisponde a un iPhone"""
+        name_lower = name.lower()
+        return any(keyword in name_lower for keyword in DEVICE_NAME_KEYWORDS)
 
     def _find_iphone(self) -> Optional[object]:
         """Trova il dispositivo iPhone connesso"""
+        # Prova prima il percorso shell salvato all'ultima esecuzione
+        try:
+            with open(DEVICE_CACHE_PATH, 'r', encoding='utf-8') as f:
+                cached_path = json.load(f).get('iphone_path')
+            folder = self.shell.Namespace(cached_path) if cached_path else None
+            if folder and self._is_iphone_name(folder.Self.Name):
+                return folder.Self
+        except Exception:
+            pass  # Cache assente o dispositivo non più collegato
+        
         computer = self.shell.Namespace(17)  # CSIDL_DRIVES
         
-        for item in computer.Items():
-            name_lower = item.Name.lower()
-            if "iphone" in name_lower or "apple" in name_lower:
+        for item in list(computer.Items()):
+            if self._is_iphone_name(item.Name):
+                try:
+                    with open(DEVICE_CACHE_PATH, 'w', encoding='utf-8') as f:
+                        json.dump({'iphone_path': item.Path}, f, indent=2)
+                except OSError:
+                    pass
                 return item
         return None
 
+    def _open_wpd(self, iphone: object) -> Optional[WPDDevice]:
+        """Apre il dispositivo via WPD partendo dall'elemento shell dell'iPhone"""
+        if wpd_api is None:
+            return None
+        
+        # Il percorso shell MTP contiene l'ID dispositivo WPD (\\?\usb#...)
+        match = re.search(r"\\\\\?\\[^\\]+", iphone.Path)
+        if not match:
+            return None
+        
+        try:
+            device = WPDDevice(match.group(0))
+            for name, (object_id, _, _) in device.children(WPD_DEVICE_OBJECT_ID).items():
+                if name.lower() == "internal storage":
+                    self.wpd_rolls = device.children(object_id)
+                    return device
+            device.close()
+        except Exception as e:
+            self.log(f"⚠️ WPD not available, using Windows shell: {e}")
+        return None
+
     def _find_folder(self, parent: object, target_name: str) -> Optional[object]:
         """Cerca una sotto-cartella (case-insensitive)"""
         target_lower = target_name.lower()
         
-        for sub in parent.GetFolder.Items():
-            if sub.IsFolder and sub.Name.lower() == target_lower:
+        # Snapshot unico della collezione per ridurre i round-trip MTP
+        snapshot = [(sub.IsFolder, sub) for sub in parent.GetFolder.Items()]
+        for is_folder, sub in snapshot:
+            if is_folder and sub.Name.lower() == target_lower:
                 return sub
         return None
 
@@ -121,81 +421,250 @@ class IPhoneMTPCopier:
         except:
             pass
 
-    def _copy_file_mtp(self, file_item: object, dest_path: str) -> bool:
-        """Copia un singolo file da MTP"""
+    @staticmethod
+    def _wait_until(path: str, timeout: float = CLIPBOARD_TIMEOUT) -> bool:
+        """Attende che il file compaia, con backoff esponenziale fino al timeout"""
+        deadline = time.time() + timeout
+        delays = iter(WAIT_DELAYS)
+        while True:
+            if _file_exists(path):
+                return True
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            time.sleep(min(next(delays, WAIT_DELAYS[-1]), remaining))
+
+    def _record_copy(self, file_start: float) -> None:
+        """Aggiorna le statistiche dopo una copia riuscita"""
+        copy_time = time.time() - file_start
+        with self._stats_lock:
+            self.copy_time_sum += copy_time
+            self.files_copied_total += 1
+
+    def _copy_file_wpd(self, device: WPDDevice, wpd_entry: Tuple[str, int, Optional[float]], dest_path: str) -> bool:
+        """Copia un singolo file leggendolo direttamente dal dispositivo via WPD"""
         file_start = time.time()
+        object_id, size, mtime = wpd_entry
         try:
-            dest_folder = self.shell.Namespace(os.path.dirname(dest_path))
-            if dest_folder:
-                dest_folder.CopyHere(file_item, 16)  # 16 = Respond "Yes to All"
-                time.sleep(0.03)
-                
-                if os.path.exists(dest_path):
-                    copy_time = time.time() - file_start
-                    self.copy_times.append(copy_time)
-                    self.files_copied_total += 1
-                    return True
-            
-            # Fallback: metodo clipboard
-            self._clear_clipboard()
-            file_item.InvokeVerbEx("copy")
-            dest_folder.Self.InvokeVerbEx("paste")
-            
-            time.sleep(0.1)
-            if os.path.exists(dest_path):
-                copy_time = time.time() - file_start
-                self.copy_times.append(copy_time)
-                self.files_copied_total += 1
+            if device.transfer(object_id, dest_path, size, mtime):
+                self._record_copy(file_start)
                 return True
-            return False
-            
+        except Exception as e:
+            self.log(f"⚠️ WPD copy failed, retrying with Windows shell: {e}")
+        return False
+
+    def _copy_file(self, file_item: object, dest_folder: object, dest_path: str,
+                   wpd_entry: Optional[Tuple[str, int, Optional[float]]] = None) -> bool:
+        """Copia un file via WPD quando disponibile, altrimenti tramite la shell.
+        Solo per il thread principale: usa self.wpd, legato al suo apartment COM."""
+        if wpd_entry and self.wpd and self._copy_file_wpd(self.wpd, wpd_entry, dest_path):
+            return True
+        return self._copy_file_mtp(file_item, dest_folder, dest_path)
+
+    def _copy_file_logged(self, file_item: object, dest_folder: object, dest_path: str,
+                          wpd_entry: Optional[Tuple[str, int, Optional[float]]] = None) -> Tuple[bool, str]:
+        """Copia un file sul thread principale restituendo esito e ora di completamento;
+        un errore imprevisto fa fallire solo questo file, come nei worker"""
+        try:
+            ok = self._copy_file(file_item, dest_folder, dest_path, wpd_entry)
         except Exception as e:
             self.log(f"❌ Error during copy: {e}")
+            ok = False
+        return ok, self._timestamp()
+
+    def _copy_file_mtp(self, file_item: object, dest_folder: object, dest_path: str) -> bool:
+        """Copia un singolo file da MTP tramite la shell di Windows"""
+        if not dest_folder:
+            self.log(f"❌ Error during copy: destination folder not available ({dest_path})")
             return False
+        
+        file_start = time.time()
+        try:
+            dest_folder.CopyHere(file_item, 16)  # 16 = Respond "Yes to All"
+        except pywintypes.com_error as e:
+            self.log(f"❌ Error during copy: {e}")
+            return False
+        
+        if self._wait_until(dest_path, COPYHERE_TIMEOUT):
+            self._record_copy(file_start)
+            return True
+        
+        # Fallback: metodo clipboard (il clipboard è globale, un thread alla volta)
+        with self._clipboard_lock:
+            self._clear_clipboard()
+            try:
+                file_item.InvokeVerbEx("copy")
+                dest_folder.Self.InvokeVerbEx("paste")
+            except pywintypes.com_error as e:
+                self.log(f"❌ Error during copy: {e}")
+                return False
+            
+            if self._wait_until(dest_path, CLIPBOARD_TIMEOUT):
+                self._record_copy(file_start)
+                return True
+        return False
+
+    def _copy_files_worker(self, jobs: queue.Queue, src_path: str, dst_path: str) -> Dict[int, Tuple[bool, str]]:
+        """Copia i file della coda in un thread dedicato, con il proprio apartment COM"""
+        pythoncom.CoInitialize()
+        shell = src_folder = dest_folder = device = file_item = None
+        results = {}
+        try:
+            # Gli oggetti COM della shell appartengono all'apartment del thread
+            # principale, che è bloccato in attesa dei worker: ogni thread riceve
+            # solo i nomi e risolve gli item nel proprio Shell.Application, con la
+            # propria cartella di destinazione e la propria connessione WPD
+            shell = win32.Dispatch("Shell.Application")
+            src_folder = shell.Namespace(src_path)
+            dest_folder = shell.Namespace(dst_path)
+            if self.wpd:
+                try:
+                    device = WPDDevice(self.wpd.device_id)
+                except Exception as e:
+                    self.log(f"⚠️ WPD not available in worker, using Windows shell: {e}")
+            
+            while True:
+                try:
+                    idx, name, dest_path, wpd_entry = jobs.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    # WPD non usa l'item shell: lo si risolve solo se serve la shell
+                    ok = bool(wpd_entry and device and self._copy_file_wpd(device, wpd_entry, dest_path))
+                    if not ok:
+                        file_item = src_folder.ParseName(name) if src_folder else None
+                        if file_item:
+                            ok = self._copy_file_mtp(file_item, dest_folder, dest_path)
+                        else:
+                            self.log(f"❌ Error during copy: {name} not found on device")
+                    results[idx] = (ok, self._timestamp())
+                except Exception as e:
+                    self.log(f"❌ Error during copy: {e}")
+                    results[idx] = (False, self._timestamp())
+                finally:
+                    file_item = None
+        finally:
+            if device:
+                device.close()
+            shell = src_folder = dest_folder = device = None
+            pythoncom.CoUninitialize()
+        return results
+
+    def _copy_files_parallel(self, pending: List[Tuple[int, str, object, str, Optional[Tuple[str, int, Optional[float]]]]],
+                             dest_folder: object, src_path: str, dst_path: str) -> Dict[int, Tuple[bool, str]]:
+        """Copia in parallelo i file mancanti, con ripiego sequenziale se il dispositivo serializza.
+        Per ogni file restituisce l'esito e l'ora di completamento."""
+        if self.max_workers == 1 or len(pending) < 2:
+            return {idx: self._copy_file_logged(item, dest_folder, dest, wpd_entry)
+                    for idx, _, item, dest, wpd_entry in pending}
+        
+        jobs = queue.Queue()
+        for idx, name, _, dest, wpd_entry in pending:
+            jobs.put((idx, name, dest, wpd_entry))
+        
+        results = {}
+        workers = min(self.max_workers, len(pending))
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            futures = [ex.submit(self._copy_files_worker, jobs, src_path, dst_path) for _ in range(workers)]
+            for future in as_completed(futures):
+                try:
+                    results.update(future.result())
+                except Exception as e:
+                    self.log(f"❌ Copy worker failed: {e}")
+        
+        # I file non copiati si ritentano in sequenza. Se falliva in parallelo
+        # almeno metà dei file e il nuovo tentativo ne recupera la maggior parte,
+        # il dispositivo non regge la concorrenza: si prosegue con 1 worker
+        failed = [entry for entry in pending if not results.get(entry[0], (False,))[0]]
+        if failed:
+            for idx, _, item, dest, wpd_entry in failed:
+                results[idx] = self._copy_file_logged(item, dest_folder, dest, wpd_entry)
+            recovered = sum(1 for entry in failed if results[entry[0]][0])
+            if len(failed) >= 2 and len(failed) * 2 >= len(pending) and recovered * 2 > len(failed):
+                self.log("⚠️ Device does not handle parallel copies, switching to sequential mode")
+                self.max_workers = 1
+        
+        return results
 
-    def _process_roll(self, roll: object, roll_idx: int, total_rolls: int, source_files: List) -> str:
+    def _process_roll(self, roll_name: str, roll_path: str, roll_idx: int, total_rolls: int, source_files: List) -> str:
         """Processa una singola roll/cartella"""
-        dst_path = os.path.join(self.dest_dir, roll.Name)
+        dst_path = os.path.join(self.dest_dir, roll_name)
         source_count = len(source_files)
         
         # Crea la cartella se non esiste
-        if not os.path.exists(dst_path):
-            os.makedirs(dst_path)
-            self.log(f"📁 [{roll_idx}/{total_rolls}] New folder: {roll.Name} ({source_count} files to copy)")
+        new_folder = not os.path.isdir(dst_path)
+        os.makedirs(dst_path, exist_ok=True)
+        if new_folder:
+            self.log(f"📁 [{roll_idx}/{total_rolls}] New folder: {roll_name} ({source_count} files to copy)")
         else:
-            self.log(f"📁 [{roll_idx}/{total_rolls}] Checking folder: {roll.Name} ({source_count} files)")
+            self.log(f"📁 [{roll_idx}/{total_rolls}] Checking folder: {roll_name} ({source_count} files)")
         
         # Scansiona e copia i file mancanti
         files_copied = 0
         files_skipped = 0
         files_failed = 0
         
+        # Elenco dei file già presenti letto con una sola scansione
+        with os.scandir(dst_path) as it:
+            existing = {entry.name for entry in it}
+        
+        # Object ID WPD dei file della roll (vuoto se WPD non disponibile)
+        wpd_files = {}
+        if self.wpd and roll_name in self.wpd_rolls:
+            try:
+                wpd_files = self.wpd.children(self.wpd_rolls[roll_name][0])
+            except Exception as e:
+                self.log(f"⚠️ WPD listing failed for {roll_name}, using Windows shell: {e}")
+        
+        # Righe di log per file (indice, ora dell'evento, testo), scritte tutte insieme a fine cartella
+        lines = []
+        pending = []
+        dst_prefix = dst_path + os.sep  # Percorso base costante per tutta la roll
         for idx, file_item in enumerate(source_files, 1):
-            dest_file = os.path.join(dst_path, file_item.Name)
+            name = file_item.Name
             
-            if os.path.exists(dest_file):
+            if name in existing:
                 files_skipped += 1
-                self.log(f"  [{idx}/{source_count}] ⏭️  File already exists: {roll.Name}/{file_item.Name}")
+                if self.verbose:
+                    lines.append((idx, self._timestamp(), f"  [{idx}/{source_count}] ⏭️  File already exists: {roll_name}/{name}"))
                 continue
             
-            if self._copy_file_mtp(file_item, dest_file):
+            pending.append((idx, name, file_item, dst_prefix + name, wpd_files.get(name)))
+        
+        # Cartella di destinazione risolta una sola volta per la roll
+        dest_folder = self.shell.Namespace(dst_path) if pending else None
+        results = self._copy_files_parallel(pending, dest_folder, roll_path, dst_path)
+        for idx, name, _, _, _ in pending:
+            ok, ts = results[idx]
+            if ok:
                 files_copied += 1
-                self.log(f"  [{idx}/{source_count}] ✅ Copied: {roll.Name}/{file_item.Name}")
+                if self.verbose:
+                    lines.append((idx, ts, f"  [{idx}/{source_count}] ✅ Copied: {roll_name}/{name}"))
             else:
                 files_failed += 1
-                self.log(f"  [{idx}/{source_count}] ❌ Failed: {roll.Name}/{file_item.Name}")
+                lines.append((idx, ts, f"  [{idx}/{source_count}] ❌ Failed: {roll_name}/{name}"))
+        
+        self.log_batch([(ts, msg) for _, ts, msg in sorted(lines, key=itemgetter(0))])
         
         # Determina lo stato finale
         if files_failed > 0:
-            self.log(f"⚠️  [{roll_idx}/{total_rolls}] Completed with errors: {roll.Name} ({files_copied} copied, {files_skipped} skipped, {files_failed} failed)")
+            self.log(f"⚠️  [{roll_idx}/{total_rolls}] Completed with errors: {roll_name} ({files_copied} copied, {files_skipped} skipped, {files_failed} failed)")
             return "errore"
         elif files_copied == 0 and files_skipped == source_count:
-            self.log(f"✅ [{roll_idx}/{total_rolls}] Already complete: {roll.Name} ({files_skipped} files)")
+            self.log(f"✅ [{roll_idx}/{total_rolls}] Already complete: {roll_name} ({files_skipped} files)")
             return "saltata"
         else:
-            self.log(f"✅ [{roll_idx}/{total_rolls}] Completed: {roll.Name} ({files_copied} copied, {files_skipped} skipped)")
+            self.log(f"✅ [{roll_idx}/{total_rolls}] Completed: {roll_name} ({files_copied} copied, {files_skipped} skipped)")
             return "completata"
     
+    @staticmethod
+    def _count_destination_files(dst_path: str) -> Optional[int]:
+        """Conta i file già copiati in una cartella (None se non esiste)"""
+        if not os.path.isdir(dst_path):
+            return None
+        with os.scandir(dst_path) as it:
+            return sum(1 for _ in it)
+
     def _format_time(self, seconds: float) -> str:
         """Formatta secondi in formato leggibile"""
         if seconds < 60:
@@ -211,11 +680,11 @@ class IPhoneMTPCopier:
     
     def _calculate_eta(self, rolls_done: int, total_rolls: int, files_per_roll_avg: float) -> str:
         """Calcola tempo stimato rimanente"""
-        if not self.copy_times or rolls_done == 0:
+        if not self.files_copied_total or rolls_done == 0:
             return "Calculating..."
         
         # Velocità media (secondi per file)
-        avg_time_per_file = sum(self.copy_times) / len(self.copy_times)
+        avg_time_per_file = self.copy_time_sum / self.files_copied_total
         
         # Stima file rimanenti
         rolls_remaining = total_rolls - rolls_done
@@ -244,11 +713,15 @@ class IPhoneMTPCopier:
             self.log("❌ Internal Storage not found.")
             return CopyResult([], [], [])
         
-        # Ottieni tutte le rolls ordinate
-        rolls = sorted(
-            (item for item in internal.GetFolder.Items() if item.IsFolder),
-            key=lambda x: x.Name
-        )
+        # Trasferimento diretto WPD, se disponibile
+        self.wpd = self._open_wpd(iphone)
+        if self.wpd:
+            self.log("🔌 Using direct WPD transfer")
+        
+        # Ottieni tutte le rolls ordinate (Name e IsFolder letti una sola volta)
+        snapshot = [(item.Name, item.IsFolder, item) for item in internal.GetFolder.Items()]
+        rolls = sorted(((name, item) for name, is_folder, item in snapshot if is_folder),
+                       key=itemgetter(0))
         
         total_rolls = len(rolls)
         self.log(f"📲 Starting copy of {total_rolls} folders…")
@@ -258,25 +731,38 @@ class IPhoneMTPCopier:
         total_files_in_rolls = 0
         rolls_with_files = 0
         
-        for idx, roll in enumerate(rolls, 1):
+        for idx, (roll_name, roll) in enumerate(rolls, 1):
             try:
                 # Stampa prima quale cartella sta per analizzare
-                print(f"\n📂 [{idx}/{total_rolls}] Analyzing folder: {roll.Name}")
+                print(f"\n📂 [{idx}/{total_rolls}] Analyzing folder: {roll_name}")
+                
+                folder_items = roll.GetFolder.Items()
+                
+                # Cartella già completa: stesso numero di elementi, niente enumerazione.
+                # L'ultima roll riceve le nuove foto: lo stesso numero di file non
+                # garantisce gli stessi file, quindi viene sempre controllata per intero
+                dst_count = None
+                if idx < total_rolls:
+                    dst_count = self._count_destination_files(os.path.join(self.dest_dir, roll_name))
+                if dst_count is not None and dst_count == folder_items.Count:
+                    self.log(f"✅ [{idx}/{total_rolls}] Already complete: {roll_name} ({dst_count} files)")
+                    result.saltate.append(roll_name)
+                    continue
                 
                 # Ottieni i file della cartella
-                roll_files = [f for f in roll.GetFolder.Items() if not f.IsFolder]
+                roll_files = [f for f in folder_items if not f.IsFolder]
                 if roll_files:
                     total_files_in_rolls += len(roll_files)
                     rolls_with_files += 1
                 
-                status = self._process_roll(roll, idx, total_rolls, roll_files)
+                status = self._process_roll(roll_name, roll.Path, idx, total_rolls, roll_files)
                 
                 if status == "completata":
-                    result.completate.append(roll.Name)
+                    result.completate.append(roll_name)
                 elif status == "saltata":
-                    result.saltate.append(roll.Name)
+                    result.saltate.append(roll_name)
                 elif status == "errore":
-                    result.errori.append(roll.Name)
+                    result.errori.append(roll_name)
                 
                 # Mostra ETA dopo ogni cartella processata (solo se ci sono stati file copiati)
                 if idx < total_rolls and self.files_copied_total > 0 and status != "saltata":
@@ -285,8 +771,8 @@ class IPhoneMTPCopier:
                     self.log(f"⏱️ Time remaining: {eta} (statistical estimate)\n")
                     
             except Exception as e:
-                self.log(f"❌ Critical error {roll.Name}: {e}")
-                result.errori.append(roll.Name)
+                self.log(f"❌ Critical error {roll_name}: {e}")
+                result.errori.append(roll_name)
         
         # Calcola statistiche finali
         tempo_totale = time.time() - self.start_time